@@ -6,6 +6,9 @@ import json
 import os
 from typing import List, Dict, Any
 
+from bbg_service import bbg_service
+from metrics import timed, STAGE_DURATION, FETCH_DURATION, FETCH_ERRORS, ROWS_WRITTEN
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -13,6 +16,15 @@ logger = logging.getLogger(__name__)
 # Database file path
 DB_PATH = "markets.db"
 
+# Optional httpx transport for upstream APIs (benchmarks swap in local stand-ins)
+HTTP_TRANSPORT = None
+
+# Delay between CLOB history requests (seconds) to stay under the rate limit
+CLOB_HISTORY_DELAY = 1.0
+
+# Sovereigns whose bond universe is snapshotted for the historical RV replay
+BOND_SNAPSHOT_COUNTRIES = [c.strip().upper() for c in os.getenv("BOND_SNAPSHOT_COUNTRIES", "BRA").split(",") if c.strip()]
+
 # Gemini API configuration
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")  # Set via environment variable
 
@@ -22,9 +34,23 @@ def init_db():
     with open("schema.sql", "r") as f:
         schema = f.read()
     cursor.executescript(schema)
+
+    # Backfill the search index for databases created before markets_fts existed
+    cursor.execute("SELECT COUNT(*) FROM markets_fts")
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("INSERT INTO markets_fts (rowid, question) SELECT rowid, question FROM markets")
+
     conn.commit()
     conn.close()
 
+def index_market_question(cursor, market_id: str, question: str):
+    """Keeps the FTS5 row for a market in sync with its question text."""
+    cursor.execute("SELECT rowid FROM markets WHERE id = ?", (market_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return
+    cursor.execute("INSERT OR REPLACE INTO markets_fts (rowid, question) VALUES (?, ?)", (row[0], question))
+
 def tag_market_with_keywords(text: str) -> List[str]:
     """Tags markets with country codes using comprehensive keyword matching."""
     # Expanded keyword dictionary with 50+ countries and entities
@@ -154,12 +180,40 @@ def tag_market_fallback(text: str) -> List[str]:
                 
     return related_countries
 
+def store_bond_snapshot(country_code: str, bonds: List[Dict[str, Any]], as_of_date: str = None):
+    """Persists today's bond universe, replacing any earlier capture for the same day and country."""
+    import datetime
+    if not bonds:
+        return
+    as_of_date = as_of_date or datetime.date.today().isoformat()
+
+    conn = sqlite3.connect(DB_PATH)
+    # One transaction: bonds that dropped out since the last capture must not linger
+    with conn:
+        conn.execute("DELETE FROM bond_snapshots WHERE as_of_date = ? AND country_code = ?", (as_of_date, country_code.upper()))
+        conn.executemany("""
+            INSERT INTO bond_snapshots (as_of_date, country_code, isin, ticker, maturity, yield)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [(as_of_date, country_code.upper(), b["isin"], b.get("ticker"), b["maturity"], b["yield"]) for b in bonds])
+    conn.close()
+    ROWS_WRITTEN.inc(len(bonds), table="bond_snapshots")
+
+@timed(STAGE_DURATION, stage="snapshot_bonds")
+def snapshot_bonds():
+    """Captures the current bond universe for every configured sovereign (scheduled job)."""
+    for country in BOND_SNAPSHOT_COUNTRIES:
+        try:
+            store_bond_snapshot(country, bbg_service.fetch_bond_data([], country))
+        except Exception as e:
+            logger.error(f"Error snapshotting bonds for {country}: {e}")
+
+@timed(FETCH_DURATION, source="polymarket")
 async def fetch_polymarket() -> List[Dict[str, Any]]:
     # Fetch Events instead of just Markets for better linking and grouping
     url = "https://gamma-api.polymarket.com/events?active=true&closed=false&limit=100"
     markets = []
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with httpx.AsyncClient(timeout=30.0, transport=HTTP_TRANSPORT) as client:
             response = await client.get(url)
             response.raise_for_status()
             data = response.json()
@@ -196,14 +250,16 @@ async def fetch_polymarket() -> List[Dict[str, Any]]:
                 
     except Exception as e:
         logger.error(f"Error fetching Polymarket: {e}")
+        FETCH_ERRORS.inc(source="polymarket")
         
     return markets
 
+@timed(FETCH_DURATION, source="kalshi")
 async def fetch_kalshi() -> List[Dict[str, Any]]:
     url = "https://api.elections.kalshi.com/trade-api/v2/events?status=open&limit=200"
     markets = []
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with httpx.AsyncClient(timeout=30.0, transport=HTTP_TRANSPORT) as client:
             response = await client.get(url)
             response.raise_for_status()
             data = response.json()
@@ -238,23 +294,27 @@ async def fetch_kalshi() -> List[Dict[str, Any]]:
 
     except Exception as e:
         logger.error(f"Error fetching Kalshi: {e}")
+        FETCH_ERRORS.inc(source="kalshi")
 
     return markets
 
 async def fetch_polymarket_history(clob_token_id: str) -> List[Dict[str, Any]]:
     """Fetches price history for a specific Polymarket token."""
     import asyncio
-    await asyncio.sleep(1.0) # Conservative rate limit for CLOB history
+    await asyncio.sleep(CLOB_HISTORY_DELAY) # Conservative rate limit for CLOB history
     # 'max' interval with '1440' fidelity (daily) or 'all'
     url = f"https://clob.polymarket.com/prices-history?market={clob_token_id}&interval=max&fidelity=1440"
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url)
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("history", [])
+        with FETCH_DURATION.time(source="clob"):
+            async with httpx.AsyncClient(timeout=10.0, transport=HTTP_TRANSPORT) as client:
+                response = await client.get(url)
+        if response.status_code == 200:
+            data = response.json()
+            return data.get("history", [])
+        FETCH_ERRORS.inc(source="clob")
     except Exception as e:
         logger.error(f"Error fetching history for {clob_token_id}: {e}")
+        FETCH_ERRORS.inc(source="clob")
     return []
 
 async def update_market_history(cursor, market_id: str, clob_token_ids: List[str], outcome_labels: List[str], current_prob: float):
@@ -284,6 +344,7 @@ async def update_market_history(cursor, market_id: str, clob_token_ids: List[str
                     INSERT OR REPLACE INTO market_history (market_id, outcome_label, price, timestamp)
                     VALUES (?, ?, ?, ?)
                 """, (market_id, label, price * 100, dt))
+                ROWS_WRITTEN.inc(table="market_history")
         
         # This guarantees the graph always reaches 'now' with the current probability
         # We use the current probability from the main market dict to ensure the end point is accurate
@@ -293,13 +354,17 @@ async def update_market_history(cursor, market_id: str, clob_token_ids: List[str
                 INSERT OR REPLACE INTO market_history (market_id, outcome_label, price, timestamp)
                 VALUES (?, ?, ?, ?)
              """, (market_id, label, current_prob, now_iso))
+             ROWS_WRITTEN.inc(table="market_history")
 
+@timed(STAGE_DURATION, stage="update_markets")
 async def update_markets():
     logger.info("Starting market update...")
-    init_db()
+    with STAGE_DURATION.time(stage="init_db"):
+        init_db()
     
-    poly_markets = await fetch_polymarket()
-    kalshi_markets = await fetch_kalshi()
+    with STAGE_DURATION.time(stage="fetch"):
+        poly_markets = await fetch_polymarket()
+        kalshi_markets = await fetch_kalshi()
     all_markets = poly_markets + kalshi_markets
     
     logger.info(f"Fetched {len(poly_markets)} Polymarket + {len(kalshi_markets)} Kalshi = {len(all_markets)} total")
@@ -314,11 +379,22 @@ async def update_markets():
         if not related:
             logger.debug(f"No countries tagged for: {m['question']}")
         
-        # Insert Market
+        # Upsert Market (keeps rowid stable so the FTS index can key on it)
         cursor.execute("""
-            INSERT OR REPLACE INTO markets (id, source, question, current_probability, outcomes, clob_token_ids, slug, price_change_24h, last_updated)
+            INSERT INTO markets (id, source, question, current_probability, outcomes, clob_token_ids, slug, price_change_24h, last_updated)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        """, (m["id"], m["source"], m["question"], m["probability"], str(m["outcomes"]), str(m["clob_token_ids"]), m["slug"], m["price_change_24h"]))
+            ON CONFLICT(id) DO UPDATE SET
+                source = excluded.source,
+                question = excluded.question,
+                current_probability = excluded.current_probability,
+                outcomes = excluded.outcomes,
+                clob_token_ids = excluded.clob_token_ids,
+                slug = excluded.slug,
+                price_change_24h = excluded.price_change_24h,
+                last_updated = CURRENT_TIMESTAMP
+        """, (m["id"], m["source"], m["question"], m["probability"], str(m["outcomes"]), str(m.get("clob_token_ids", "[]")), m["slug"], m["price_change_24h"]))
+        index_market_question(cursor, m["id"], m["question"])
+        ROWS_WRITTEN.inc(table="markets")
         
         # Fetch and store history for Polymarket (only for top few to avoid rate limiting)
         # Actually, let's just do it for all but maybe it's too slow?
@@ -333,7 +409,8 @@ async def update_markets():
                 if isinstance(outcomes, str):
                     outcomes = json.loads(outcomes.replace("'", '"'))
                 
-                await update_market_history(cursor, m["id"], clob_ids, outcomes, m["probability"])
+                with STAGE_DURATION.time(stage="history"):
+                    await update_market_history(cursor, m["id"], clob_ids, outcomes, m["probability"])
             except Exception as e:
                 logger.error(f"Error updating history for {m['id']}: {e}")
 
@@ -341,6 +418,7 @@ async def update_markets():
         cursor.execute("DELETE FROM market_tags WHERE market_id = ?", (m["id"],))
         for code in related:
             cursor.execute("INSERT INTO market_tags (market_id, country_code) VALUES (?, ?)", (m["id"], code))
+        ROWS_WRITTEN.inc(len(related), table="market_tags")
             
         conn.commit()
             
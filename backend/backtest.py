@@ -0,0 +1,164 @@
+import os
+import sqlite3
+import multiprocessing
+import logging
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional
+
+from aggregator import DB_PATH
+from quant_engine import SovereignRVEngine, record_nss_fit
+from metrics import DB_QUERY_DURATION, STAGE_DURATION
+
+logger = logging.getLogger(__name__)
+
+# Process-pool size for API-triggered replays (server-side; never above the core count)
+BACKTEST_WORKERS = min(int(os.getenv("BACKTEST_WORKERS", os.cpu_count() or 1)), os.cpu_count() or 1)
+
+# Days per warm-start chunk. Fixed so chunk boundaries (and therefore results) do not
+# depend on how many workers run them; each chunk cold-starts its first day.
+CHUNK_DAYS = 20
+
+def load_bond_snapshots(country_code: str, start: str, end: str, db_path: str = DB_PATH) -> List[Dict[str, Any]]:
+    """Loads stored daily bond snapshots in [start, end], one entry per date, oldest first."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    with DB_QUERY_DURATION.time(query="bond_snapshots"):
+        cursor.execute("""
+            SELECT as_of_date, isin, maturity, yield
+            FROM bond_snapshots
+            WHERE country_code = ? AND as_of_date BETWEEN ? AND ?
+            ORDER BY as_of_date ASC, maturity ASC
+        """, (country_code.upper(), start, end))
+        rows = cursor.fetchall()
+    conn.close()
+
+    days = {}
+    for as_of_date, isin, maturity, yld in rows:
+        day = days.setdefault(as_of_date, {"date": as_of_date, "isins": [], "maturities": [], "yields": []})
+        day["isins"].append(isin)
+        day["maturities"].append(maturity)
+        day["yields"].append(yld)
+
+    return list(days.values())
+
+def _fit_chunk(days: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Fits a contiguous run of days in one worker process.
+    Each day warm-starts from the previous day's params; the first day of a chunk starts cold.
+    Returns the fits plus (duration, iterations, success) for every optimizer run, since
+    metrics recorded inside a worker process never reach the parent's /metrics.
+    """
+    engine = SovereignRVEngine()
+    prev_params = None
+    results = []
+    fit_stats = []
+
+    for day in days:
+        maturities = np.array(day["maturities"], dtype=float)
+        yields = np.array(day["yields"], dtype=float)
+        if len(maturities) < 2:
+            continue
+
+        params = engine.fit_curve(maturities, yields, x0=prev_params)
+        fit_stats.append(engine.last_fit)
+        if params is None and prev_params is not None:
+            # A bad warm start should not lose the day; retry from the default guess
+            params = engine.fit_curve(maturities, yields)
+            fit_stats.append(engine.last_fit)
+        if params is None:
+            continue
+
+        fitted = engine.nss_model(maturities, *params)
+        results.append({
+            "date": day["date"],
+            "params": [float(p) for p in params],
+            "residuals": dict(zip(day["isins"], ((yields - fitted) * 100).tolist())), # In bps
+        })
+        prev_params = params
+
+    return {"fits": results, "fit_stats": fit_stats}
+
+class FlyBacktestEngine:
+    """Replays the "Fly" RV scanner over stored snapshots and scores its top-residual signal."""
+
+    def __init__(self, top_n: int = 5, max_workers: Optional[int] = None):
+        self.top_n = top_n
+        self.max_workers = max_workers
+
+    def fit_history(self, days: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Runs NSS fits for every day in fixed CHUNK_DAYS chunks, optionally across a process pool.
+        Output is identical for any worker count.
+        """
+        if not days:
+            return []
+
+        chunks = [days[i:i + CHUNK_DAYS] for i in range(0, len(days), CHUNK_DAYS)]
+        workers = min(self.max_workers or 1, os.cpu_count() or 1, len(chunks))
+
+        results = []
+        if workers <= 1:
+            # In-process fits already fed the NSS metrics
+            for chunk in chunks:
+                results.extend(_fit_chunk(chunk)["fits"])
+            return results
+
+        # Spawn, not fork: forking the threaded web server can copy held locks into the children
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            for chunk_results in pool.map(_fit_chunk, chunks):
+                results.extend(chunk_results["fits"])
+                for stats in chunk_results["fit_stats"]:
+                    record_nss_fit(*stats)
+        return results
+
+    def signal_pnl(self, residuals: pd.DataFrame) -> pd.DataFrame:
+        """
+        Each day, takes the top_n bonds by |residual|: long the cheap ones (positive residual)
+        and short the rich ones, then books the next day's residual convergence in bps.
+        """
+        changes = residuals.shift(-1) - residuals
+        ranks = residuals.abs().rank(axis=1, ascending=False, method="first")
+        positions = np.sign(residuals).where(ranks <= self.top_n, 0.0)
+
+        # Residual tightening on a long (or widening on a short) is profit
+        pnl = -(positions * changes).sum(axis=1)
+        pnl = pnl.iloc[:-1] if len(pnl) else pnl
+
+        return pd.DataFrame({
+            "pnl_bps": pnl,
+            "cum_pnl_bps": pnl.cumsum(),
+            "positions": (positions != 0).sum(axis=1).iloc[:len(pnl)],
+        })
+
+    def run(self, country_code: str, start: str, end: str, db_path: str = DB_PATH) -> Dict[str, Any]:
+        """Replays [start, end] for a sovereign and returns params, residual series and signal P&L."""
+        days = load_bond_snapshots(country_code, start, end, db_path)
+        with STAGE_DURATION.time(stage="backtest_fits"):
+            fits = self.fit_history(days)
+        logger.info(f"Replayed {len(fits)}/{len(days)} snapshots for {country_code} ({start} to {end})")
+
+        if not fits:
+            return {"params": pd.DataFrame(), "residuals": pd.DataFrame(), "pnl": pd.DataFrame()}
+
+        dates = [f["date"] for f in fits]
+        params = pd.DataFrame([f["params"] for f in fits], index=dates, columns=["b0", "b1", "b2", "b3", "t1", "t2"])
+        residuals = pd.DataFrame([f["residuals"] for f in fits], index=dates)
+
+        return {"params": params, "residuals": residuals, "pnl": self.signal_pnl(residuals)}
+
+if __name__ == "__main__":
+    import sys
+    # Usage: python backtest.py BRA 2023-01-01 2025-12-31
+    country = sys.argv[1] if len(sys.argv) > 1 else "BRA"
+    start = sys.argv[2] if len(sys.argv) > 2 else "0000-01-01"
+    end = sys.argv[3] if len(sys.argv) > 3 else "9999-12-31"
+
+    result = FlyBacktestEngine(max_workers=os.cpu_count()).run(country, start, end)
+    pnl = result["pnl"]
+    if pnl.empty:
+        print("No snapshots to replay.")
+    else:
+        print(pnl.tail())
+        print(f"Total P&L: {pnl['pnl_bps'].sum():.1f} bps over {len(pnl)} days")
@@ -3,6 +3,8 @@ import json
 import random
 import datetime
 
+from metrics import timed, BBG_CALL_DURATION
+
 logger = logging.getLogger(__name__)
 
 # Try to import blpapi, but don't fail if it's missing (allows demo/mock mode)
@@ -45,15 +47,17 @@ class BloombergService:
             logger.error(f"Error starting Bloomberg session: {e}")
             return False
 
-    def fetch_bond_data(self, isins):
+    @timed(BBG_CALL_DURATION, call="bond_data")
+    def fetch_bond_data(self, isins, country_code="BRA"):
         """Fetches reference and real-time data for a list of ISINs."""
         if not self.is_connected:
-            return self._mock_bond_data(isins)
+            return self._mock_bond_data(isins, country_code)
             
         # Real BLPAPI logic would go here
         # Request: YLD_YTM_MID, Z_SPD_MID, PX_LAST, MATURITY, COUPON, etc.
-        return self._mock_bond_data(isins)
+        return self._mock_bond_data(isins, country_code)
 
+    @timed(BBG_CALL_DURATION, call="cds_data")
     def fetch_cds_data(self, country_code):
         """Fetches Par CDS curve for a sovereign."""
         if not self.is_connected:
@@ -61,7 +65,7 @@ class BloombergService:
             
         return self._mock_cds_data(country_code)
 
-    def _mock_bond_data(self, isins):
+    def _mock_bond_data(self, isins, country_code="BRA"):
         """Generates realistic synthetic bond data for demonstration."""
         results = []
         # Realistic yield curve for a generic EM country (e.g. 5-8%)
@@ -76,14 +80,18 @@ class BloombergService:
                 y = base_yield + (m ** 0.5) * 0.5 + random.uniform(-0.1, 0.1)
                 z_spread = 200 + m * 5 + random.uniform(-10, 10)
                 
+                # Reference data is seeded per (country, maturity) so the same bond keeps
+                # its ISIN across calls and the historical replay can follow it
+                ref = random.Random(f"{country_code}:{m}")
+                
                 results.append({
-                    "isin": f"US{random.randint(100000, 999999)}",
-                    "ticker": f"BRAZIL {random.randint(2, 12)} {2025 + m}",
+                    "isin": f"US{ref.randint(100000, 999999)}",
+                    "ticker": f"{country_code} {ref.randint(2, 12)} {2025 + m}",
                     "maturity": m,
                     "yield": y,
                     "z_spread": z_spread,
                     "price": 100 - (y - 5.0) * 8, # Simple price proxy
-                    "coupon": random.choice([3.5, 4.25, 5.0, 6.125, 8.25]),
+                    "coupon": ref.choice([3.5, 4.25, 5.0, 6.125, 8.25]),
                     "bid_ask": random.uniform(0.05, 0.2)
                 })
         return results
@@ -0,0 +1,63 @@
+"""Shared timing, reporting and database helpers for the benchmark scripts."""
+import os
+import json
+import time
+import asyncio
+import tempfile
+import numpy as np
+
+import aggregator
+from benchmarks.upstreams import UpstreamStandIns
+
+def summarize(samples):
+    """Latency stats in milliseconds for a list of per-call durations in seconds."""
+    ms = np.asarray(samples) * 1000
+    return {
+        "n": int(ms.size),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+def bench(fn, repeat=50, warmup=3):
+    """Calls fn repeatedly and returns per-call stats."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def print_report(title, results):
+    print(f"\n{title}")
+    print(f"{'name':<48}{'n':>8}{'mean ms':>12}{'p50 ms':>12}{'p99 ms':>12}{'max ms':>12}")
+    for name, r in results.items():
+        print(f"{name:<48}{r['n']:>8}{r['mean_ms']:>12.3f}{r['p50_ms']:>12.3f}{r['p99_ms']:>12.3f}{r['max_ms']:>12.3f}")
+
+def write_json(path, results):
+    """Saves results so later runs can be diffed against a baseline."""
+    if path:
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+
+def use_temp_db():
+    """Points the aggregator and API at a fresh SQLite file so benchmarks never touch markets.db."""
+    import main
+    path = os.path.join(tempfile.mkdtemp(prefix="gembridge-bench-"), "markets.db")
+    aggregator.DB_PATH = path
+    main.DB_PATH = path
+    aggregator.init_db()
+    return path
+
+def use_stand_ins(stand_ins: UpstreamStandIns):
+    """Routes aggregator HTTP calls to the local stand-ins and drops the CLOB rate-limit delay."""
+    aggregator.HTTP_TRANSPORT = stand_ins.transport()
+    aggregator.CLOB_HISTORY_DELAY = 0.0
+
+def seed_markets(**sizes):
+    """Populates the current database by running update_markets against the stand-ins."""
+    use_stand_ins(UpstreamStandIns(**sizes))
+    asyncio.run(aggregator.update_markets())
@@ -0,0 +1,46 @@
+"""
+End-to-end update_markets benchmark against local Polymarket/CLOB/Kalshi stand-ins.
+Each run starts from an empty temporary database; the mock BloombergService needs no setup.
+Run from backend/:  python -m benchmarks.e2e [--events 100] [--history-points 365] [--runs 3]
+"""
+import argparse
+import asyncio
+import sqlite3
+import time
+
+import aggregator
+from benchmarks.common import summarize, print_report, write_json, use_temp_db, use_stand_ins
+from benchmarks.upstreams import UpstreamStandIns
+
+def run(events=100, markets_per_event=1, kalshi_events=200, history_points=365, runs=3):
+    samples = []
+    for _ in range(runs):
+        path = use_temp_db()
+        stand_ins = UpstreamStandIns(poly_events=events, markets_per_event=markets_per_event,
+                                     kalshi_events=kalshi_events, history_points=history_points)
+        use_stand_ins(stand_ins)
+
+        start = time.perf_counter()
+        asyncio.run(aggregator.update_markets())
+        samples.append(time.perf_counter() - start)
+
+    conn = sqlite3.connect(path)
+    counts = {t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in ("markets", "market_tags", "market_history")}
+    conn.close()
+    print(f"Last run: {stand_ins.requests} upstream requests, rows: {counts}")
+
+    return {"update_markets": summarize(samples)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=100, help="Polymarket events served")
+    parser.add_argument("--markets-per-event", type=int, default=1)
+    parser.add_argument("--kalshi-events", type=int, default=200)
+    parser.add_argument("--history-points", type=int, default=365, help="CLOB history points per token")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.events, args.markets_per_event, args.kalshi_events, args.history_points, args.runs)
+    print_report("End-to-end", results)
+    write_json(args.json, results)
@@ -0,0 +1,88 @@
+"""
+Async load generator for the FastAPI endpoints, reporting p50/p99 per route.
+By default drives the app in-process (httpx ASGITransport) on a temp database seeded from the
+upstream stand-ins; pass --url to hit a running server instead.
+Run from backend/:  python -m benchmarks.load [--concurrency 32] [--requests 2000] [--url http://localhost:8000]
+"""
+import argparse
+import asyncio
+import itertools
+import sqlite3
+import time
+import httpx
+
+from benchmarks.common import summarize, print_report, write_json, use_temp_db, seed_markets
+
+def default_paths(db_path=None):
+    paths = [
+        "/markets/USA",
+        "/markets/CHN",
+        "/markets/search?q=tariff",
+        "/markets/search?q=default&countries=ARG,BRA",
+        "/credit/curve/BRA?type=NSS",
+        "/credit/curve/BRA?type=CDS",
+        "/credit/bonds/BRA",
+    ]
+    if db_path:
+        conn = sqlite3.connect(db_path)
+        ids = [r[0] for r in conn.execute("SELECT DISTINCT market_id FROM market_history LIMIT 5")]
+        conn.close()
+        paths += [f"/history/{market_id}" for market_id in ids]
+    return paths
+
+async def drive(client, paths, concurrency, total):
+    """Keeps `concurrency` requests in flight until `total` have completed, cycling through paths."""
+    samples = {}
+    errors = 0
+    queue = itertools.cycle(paths)
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            path = next(queue)
+            start = time.perf_counter()
+            response = await client.get(path)
+            elapsed = time.perf_counter() - start
+            if response.status_code >= 400:
+                errors += 1
+            label = "/history/{market_id}" if path.startswith("/history/") else path
+            samples.setdefault(label, []).append(elapsed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+
+    results = {path: summarize(s) for path, s in samples.items()}
+    results["ALL"] = summarize([x for s in samples.values() for x in s])
+    print(f"{total} requests, concurrency {concurrency}, {wall:.2f}s wall, {total / wall:.0f} req/s, {errors} errors")
+    return results
+
+def prepare_in_process():
+    """Seeds a temp database from the stand-ins and returns an ASGI transport plus paths to hit."""
+    import main
+    db_path = use_temp_db()
+    seed_markets(poly_events=100, kalshi_events=200, history_points=365)
+    return httpx.ASGITransport(app=main.app), default_paths(db_path)
+
+async def run(concurrency=32, total=2000, url=None, transport=None, paths=None):
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=60.0) as client:
+            return await drive(client, paths or default_paths(), concurrency, total)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60.0) as client:
+        return await drive(client, paths, concurrency, total)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--url", help="Base URL of a running server (default: in-process)")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    transport, paths = (None, None) if args.url else prepare_in_process()
+    results = asyncio.run(run(args.concurrency, args.requests, args.url, transport, paths))
+    print_report("Load test", results)
+    write_json(args.json, results)
@@ -0,0 +1,63 @@
+"""
+Micro-benchmarks for the hot paths: NSS evaluation and fitting, keyword tagging and the /history pivot.
+Run from backend/:  python -m benchmarks.micro [--repeat 50] [--json micro.json]
+"""
+import argparse
+import random
+import datetime
+import numpy as np
+
+from aggregator import tag_market_with_keywords
+from bbg_service import bbg_service
+from quant_engine import SovereignRVEngine
+from main import pivot_history
+from benchmarks.common import bench, print_report, write_json
+from benchmarks.upstreams import UpstreamStandIns
+
+def history_rows(points, outcomes=("Yes", "No")):
+    """Rows shaped like the market_history query: (outcome_label, price, timestamp)."""
+    start = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    rows = []
+    for i in range(points):
+        ts = (start + datetime.timedelta(hours=i)).isoformat()
+        for label in outcomes:
+            rows.append((label, random.uniform(1, 99), ts))
+    return rows
+
+def run(repeat=50):
+    random.seed(0)
+    engine = SovereignRVEngine()
+    params = [5.0, -1.0, 0.5, 0.2, 1.5, 8.0]
+    grid = np.linspace(0.1, 30, 100)
+
+    bonds = bbg_service.fetch_bond_data([])
+    maturities = [b["maturity"] for b in bonds]
+    yields = [b["yield"] for b in bonds]
+
+    # Warm start from the previous synthetic day (yields moved a few bps), as the replay does
+    rng = np.random.default_rng(0)
+    prev_params = SovereignRVEngine().fit_curve(maturities, np.array(yields) + rng.normal(0, 0.05, len(yields)))
+
+    stand_ins = UpstreamStandIns(poly_events=1000)
+    questions = [m["question"] for e in stand_ins.polymarket_events() for m in e["markets"]]
+
+    rows_small, rows_large = history_rows(365), history_rows(8760)
+
+    return {
+        "nss_model[100]": bench(lambda: engine.nss_model(grid, *params), repeat=repeat * 10),
+        "fit_curve[10 bonds]": bench(lambda: engine.fit_curve(maturities, yields), repeat=repeat),
+        "fit_curve[warm start]": bench(lambda: engine.fit_curve(maturities, yields, x0=prev_params), repeat=repeat),
+        "tag_market_with_keywords[1k]": bench(lambda: [tag_market_with_keywords(q) for q in questions], repeat=repeat),
+        "history_pivot[365d x 2]": bench(lambda: pivot_history(rows_small), repeat=repeat),
+        "history_pivot[1y hourly x 2]": bench(lambda: pivot_history(rows_large), repeat=repeat),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    print_report("Micro-benchmarks", results)
+    write_json(args.json, results)
@@ -0,0 +1,76 @@
+"""Deterministic local stand-ins for the Polymarket, CLOB and Kalshi APIs (httpx MockTransport)."""
+import json
+import random
+import datetime
+import httpx
+
+# Question templates mix country keywords so tagging and search have realistic work to do
+SUBJECTS = ["Trump", "Xi Jinping", "Putin", "Zelenskyy", "Netanyahu", "Macron", "Modi", "Erdogan",
+            "the Fed", "the ECB", "the BOJ", "Brazil", "Argentina", "Mexico", "Turkey", "Saudi Arabia"]
+TEMPLATES = ["Will {s} announce new tariffs by {d}?", "Will {s} default on sovereign debt before {d}?",
+             "Will {s} win the next election?", "Will {s} cut rates by {d}?",
+             "Will {s} sign a ceasefire agreement by {d}?", "Will {s} meet with the G20 before {d}?"]
+MONTHS = ["March", "June", "September", "December"]
+
+class UpstreamStandIns:
+    """Serves synthetic but fully reproducible payloads sized by the constructor arguments."""
+
+    def __init__(self, poly_events=100, markets_per_event=1, kalshi_events=200, history_points=365, seed=7):
+        self.poly_events = poly_events
+        self.markets_per_event = markets_per_event
+        self.kalshi_events = kalshi_events
+        self.history_points = history_points
+        self.seed = seed
+        self.requests = 0
+
+    def _question(self, rng):
+        return rng.choice(TEMPLATES).format(s=rng.choice(SUBJECTS), d=rng.choice(MONTHS))
+
+    def polymarket_events(self):
+        rng = random.Random(self.seed)
+        events = []
+        for e in range(self.poly_events):
+            markets = []
+            for k in range(self.markets_per_event):
+                yes = round(rng.uniform(0.01, 0.99), 3)
+                markets.append({
+                    "id": f"{e}-{k}",
+                    "question": self._question(rng),
+                    "outcomePrices": json.dumps([str(yes), str(round(1 - yes, 3))]),
+                    "outcomes": '["Yes", "No"]',
+                    "clobTokenIds": json.dumps([f"tok{e}-{k}-yes", f"tok{e}-{k}-no"]),
+                    "priceChange24h": round(rng.uniform(-0.05, 0.05), 4),
+                })
+            events.append({"slug": f"event-{e}", "markets": markets})
+        return events
+
+    def kalshi_events_payload(self):
+        rng = random.Random(self.seed + 1)
+        return {"events": [
+            {"title": self._question(rng), "event_ticker": f"KX{e}", "markets": [{"yes_price": rng.randint(1, 99)}]}
+            for e in range(self.kalshi_events)
+        ]}
+
+    def clob_history(self, token_id):
+        rng = random.Random(f"{self.seed}:{token_id}")
+        start = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc).timestamp()
+        price = rng.uniform(0.1, 0.9)
+        history = []
+        for i in range(self.history_points):
+            price = min(0.99, max(0.01, price + rng.gauss(0, 0.01)))
+            history.append({"t": int(start + i * 86400), "p": round(price, 4)})
+        return {"history": history}
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        host = request.url.host
+        if host == "gamma-api.polymarket.com":
+            return httpx.Response(200, json=self.polymarket_events())
+        if host == "clob.polymarket.com":
+            return httpx.Response(200, json=self.clob_history(request.url.params.get("market", "")))
+        if host == "api.elections.kalshi.com":
+            return httpx.Response(200, json=self.kalshi_events_payload())
+        return httpx.Response(404, json={"error": f"no stand-in for {host}"})
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handler)
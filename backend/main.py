@@ -1,4 +1,5 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from contextlib import asynccontextmanager
@@ -6,14 +7,18 @@ import sqlite3
 import json
 import os
 import logging
+import re
 from typing import List, Dict, Any, Optional
 import random
+import time
+import datetime
 import numpy as np
-from scipy.interpolate import interp1d
 
-from aggregator import update_markets, DB_PATH, init_db
+from aggregator import update_markets, DB_PATH, init_db, snapshot_bonds
 from bbg_service import bbg_service
-from quant_engine import SovereignRVEngine, get_nss_curve_points
+from quant_engine import SovereignRVEngine, get_nss_curve_points, bootstrap_cds_curve
+from backtest import FlyBacktestEngine, BACKTEST_WORKERS
+from metrics import render_metrics, maybe_start_profiler, report_slow_request, profile_thread, DB_QUERY_DURATION, HTTP_REQUEST_DURATION
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -28,6 +33,8 @@ async def lifespan(app: FastAPI):
     # Initialize scheduler
     scheduler = AsyncIOScheduler()
     scheduler.add_job(update_markets, 'interval', minutes=10)
+    # Hourly, replacing the day's rows, so the backtest gets one snapshot per day even across restarts
+    scheduler.add_job(snapshot_bonds, 'interval', hours=1, next_run_time=datetime.datetime.now())
     scheduler.start()
     
     # Run an initial update immediately (optional, or wait for first interval)
@@ -49,16 +56,98 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    profiler = maybe_start_profiler()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        # Label by route template so /markets/USA and /markets/CHN share a series
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        HTTP_REQUEST_DURATION.observe(elapsed, method=request.method, route=path, status=status)
+        report_slow_request(profiler, f"{request.method} {request.url.path}", elapsed)
+
 def get_db_connection():
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     return conn
 
 @app.get("/")
+@profile_thread
 def read_root():
     return {"status": "ok", "service": "Market Intelligence API"}
 
+def build_fts_query(q: str, prefix: bool = True) -> str:
+    """Turns free text into a safe FTS5 MATCH expression (implicit AND of quoted terms)."""
+    terms = re.findall(r"\w+", q)
+    suffix = "*" if prefix else ""
+    return " ".join(f'"{t}"{suffix}' for t in terms)
+
+# Declared before /markets/{country_code} so "search" is not captured as a country code
+@app.get("/markets/search", response_model=List[Dict[str, Any]])
+@profile_thread
+def search_markets(q: str, countries: Optional[str] = None, prefix: bool = True, limit: int = 50):
+    """
+    Full-text search over market questions, ranked by BM25.
+    Example: /markets/search?q=tariff&countries=USA,CHN
+    """
+    match = build_fts_query(q, prefix)
+    if not match:
+        return []
+
+    query = """
+        SELECT m.id, m.source, m.question, m.current_probability, m.outcomes, m.slug, m.price_change_24h, m.last_updated,
+               bm25(markets_fts) AS score
+        FROM markets_fts
+        JOIN markets m ON m.rowid = markets_fts.rowid
+        WHERE markets_fts MATCH ?
+    """
+    params: List[Any] = [match]
+
+    codes = [c.strip().upper() for c in (countries or "").split(",") if c.strip()]
+    if codes:
+        placeholders = ",".join("?" for _ in codes)
+        query += f" AND m.id IN (SELECT market_id FROM market_tags WHERE country_code IN ({placeholders}))"
+        params.extend(codes)
+
+    query += " ORDER BY score LIMIT ?"
+    params.append(max(1, min(limit, 500)))
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        with DB_QUERY_DURATION.time(query="search_markets"):
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+    except sqlite3.OperationalError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid search query: {e}")
+    finally:
+        conn.close()
+
+    results = []
+    for row in rows:
+        results.append({
+            "id": row["id"],
+            "source": row["source"],
+            "question": row["question"],
+            "probability": row["current_probability"],
+            "outcomes": row["outcomes"],
+            "slug": row["slug"],
+            "price_change_24h": row["price_change_24h"],
+            "last_updated": row["last_updated"],
+            "score": row["score"]
+        })
+
+    return results
+
 @app.get("/markets/{country_code}", response_model=List[Dict[str, Any]])
+@profile_thread
 def get_markets_by_country(country_code: str):
     """
     Fetch active markets for a specific country code (ISO-3166-1 alpha-3).
@@ -75,8 +164,9 @@ def get_markets_by_country(country_code: str):
         ORDER BY m.current_probability DESC
     """
     
-    cursor.execute(query, (country_code.upper(),))
-    rows = cursor.fetchall()
+    with DB_QUERY_DURATION.time(query="markets_by_country"):
+        cursor.execute(query, (country_code.upper(),))
+        rows = cursor.fetchall()
     conn.close()
     
     results = []
@@ -98,16 +188,20 @@ def get_markets_by_country(country_code: str):
 async def get_market_history(market_id: str):
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
-    cursor.execute("""
-        SELECT outcome_label, price, timestamp 
-        FROM market_history 
-        WHERE market_id = ? 
-        ORDER BY timestamp ASC
-    """, (market_id,))
-    rows = cursor.fetchall()
+    with DB_QUERY_DURATION.time(query="market_history"):
+        cursor.execute("""
+            SELECT outcome_label, price, timestamp 
+            FROM market_history 
+            WHERE market_id = ? 
+            ORDER BY timestamp ASC
+        """, (market_id,))
+        rows = cursor.fetchall()
     conn.close()
     
-    # Reformat for Recharts: list of {timestamp, Label1, Label2...}
+    return pivot_history(rows)
+
+def pivot_history(rows):
+    """Reformat for Recharts: list of {timestamp, Label1, Label2...}"""
     history_map = {}
     for label, price, ts in rows:
         if ts not in history_map:
@@ -122,7 +216,7 @@ async def get_market_history(market_id: str):
 async def get_sovereign_bonds(country: str):
     """Fetches bond universe and calculates RV metrics."""
     # 1. Fetch data from BBG
-    bonds = bbg_service.fetch_bond_data([])
+    bonds = bbg_service.fetch_bond_data([], country.upper())
     is_mock = not bbg_service.is_connected
     
     if not bonds:
@@ -152,9 +246,9 @@ async def get_sovereign_bonds(country: str):
     return bonds
 
 @app.get("/credit/curve/{country}")
-async def get_sovereign_curve(country: str, type: str = "NSS"):
+async def get_sovereign_curve(country: str, type: str = "NSS", rf: float = 4.5):
     """Returns points for drawing the fair-value curve."""
-    bonds = bbg_service.fetch_bond_data([])
+    bonds = bbg_service.fetch_bond_data([], country.upper())
     maturities = [b["maturity"] for b in bonds]
     yields = [b["yield"] for b in bonds]
     
@@ -166,17 +260,44 @@ async def get_sovereign_curve(country: str, type: str = "NSS"):
         return {"points": points, "is_mock": not bbg_service.is_connected}
     elif type == "CDS":
         cds_data = bbg_service.fetch_cds_data(country)
-        tenors = [c["tenor"] for c in cds_data]
-        spreads = [c["spread"] / 100 for c in cds_data] # bps to %
-        rf = 4.5 # Risk-free proxy
+        tenors = tuple(c["tenor"] for c in cds_data)
+        spreads = tuple(c["spread"] for c in cds_data)
         
-        f = interp1d(tenors, spreads, kind='linear', fill_value='extrapolate')
+        # rf is the risk-free proxy in %, bootstrapped once per CDS snapshot
+        try:
+            curve = bootstrap_cds_curve(tenors, spreads, rf / 100)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=f"Invalid CDS curve for {country}: {e}")
         m_range = np.linspace(0.1, 30, 100)
-        points = [{"maturity": float(m), "y": float(f(m)) + rf} for m in m_range]
+        fair_spreads = curve.par_spread(m_range) / 100 # bps to %
+        points = [{"maturity": float(m), "y": float(s) + rf} for m, s in zip(m_range, fair_spreads)]
         return {"points": points, "is_mock": not bbg_service.is_connected}
         
     return []
 
+@app.get("/credit/backtest/{country}")
+@profile_thread
+def get_fly_backtest(country: str, start: str, end: str, top_n: int = 5):
+    """Replays the Fly scanner over stored bond snapshots and returns residuals and signal P&L."""
+    engine = FlyBacktestEngine(top_n=top_n, max_workers=BACKTEST_WORKERS)
+    result = engine.run(country, start, end)
+    pnl = result["pnl"]
+    
+    return {
+        "residuals": json.loads(result["residuals"].to_json(orient="index")),
+        "pnl": [
+            {"date": d, "pnl_bps": float(row["pnl_bps"]), "cum_pnl_bps": float(row["cum_pnl_bps"])}
+            for d, row in pnl.iterrows()
+        ],
+        "total_pnl_bps": float(pnl["pnl_bps"].sum()) if not pnl.empty else 0.0
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+@profile_thread
+def metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.post("/trigger-update")
 async def trigger_update():
     """Manual trigger to update markets immediately."""
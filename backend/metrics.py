@@ -0,0 +1,255 @@
+import time
+import sys
+import os
+import random
+import threading
+import functools
+import asyncio
+import contextvars
+import logging
+from collections import Counter as _Tally
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets (seconds) spanning in-memory SQLite reads to slow upstream APIs
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_REGISTRY: List["_Metric"] = []
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{k}="{v}"' for k, v in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(k, "")) for k in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+class Counter(_Metric):
+    """Monotonic counter, Prometheus 'counter' type."""
+    type_name = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self):
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram, Prometheus 'histogram' type."""
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            # Layout: one count per bucket, then +Inf count, then sum
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the wall-clock duration of the enclosed block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = super().render()
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                bounds = [str(b) for b in self.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, series):
+                    labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_count{labels} {series[-2]}")
+                lines.append(f"{self.name}_sum{labels} {series[-1]}")
+        return lines
+
+def timed(histogram: Histogram, **labels):
+    """Decorator recording a function's duration; works for both sync and async functions."""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with histogram.time(**labels):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def render_metrics() -> str:
+    """Serializes every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# --- PIPELINE METRICS ---
+
+STAGE_DURATION = Histogram("gembridge_stage_duration_seconds", "Duration of aggregator pipeline stages.", ("stage",))
+FETCH_DURATION = Histogram("gembridge_fetch_duration_seconds", "Latency of upstream market API calls.", ("source",))
+FETCH_ERRORS = Counter("gembridge_fetch_errors_total", "Failed upstream market API calls.", ("source",))
+ROWS_WRITTEN = Counter("gembridge_rows_written_total", "Rows written to SQLite by the aggregator.", ("table",))
+NSS_FIT_DURATION = Histogram("gembridge_nss_fit_duration_seconds", "Duration of NSS curve fits.")
+NSS_FIT_ITERATIONS = Histogram("gembridge_nss_fit_iterations", "Optimizer iterations per NSS curve fit.",
+                               buckets=(5, 10, 25, 50, 100, 250, 500, 1000, 15000))
+NSS_FIT_FAILURES = Counter("gembridge_nss_fit_failures_total", "NSS curve fits that did not converge.")
+BBG_CALL_DURATION = Histogram("gembridge_bbg_call_duration_seconds", "Latency of Bloomberg service calls.", ("call",))
+DB_QUERY_DURATION = Histogram("gembridge_db_query_duration_seconds", "Duration of SQLite queries in API endpoints.", ("query",))
+HTTP_REQUEST_DURATION = Histogram("gembridge_http_request_duration_seconds", "API request latency.", ("method", "route", "status"))
+
+# --- SLOW REQUEST PROFILER ---
+
+# One sampler thread serves every active profile, so profilers never sample each other
+SAMPLE_INTERVAL = 0.005
+_ACTIVE_PROFILES = set()
+_SAMPLER_LOCK = threading.Lock()
+_SAMPLER_THREAD: Optional[threading.Thread] = None
+
+# Profile of the request being handled; copied into threadpool workers with the context
+_CURRENT_PROFILE: contextvars.ContextVar = contextvars.ContextVar("gembridge_profile", default=None)
+
+# Leaf frames of a thread parked with nothing to do (e.g. the event loop while a sync endpoint runs)
+IDLE_LEAVES = {"selectors.py:select", "threading.py:wait", "queue.py:get"}
+
+def _sample_loop():
+    global _SAMPLER_THREAD
+    while True:
+        time.sleep(SAMPLE_INTERVAL)
+        with _SAMPLER_LOCK:
+            if not _ACTIVE_PROFILES:
+                _SAMPLER_THREAD = None
+                return
+            wanted = set().union(*(p.thread_ids for p in _ACTIVE_PROFILES))
+
+        frames = sys._current_frames()
+        stacks = {}
+        for thread_id in wanted:
+            frame = frames.get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack and stack[0] not in IDLE_LEAVES:
+                stacks[thread_id] = ";".join(reversed(stack))
+
+        # Under the lock, so a profile that has been stopped is never written to again
+        with _SAMPLER_LOCK:
+            for profile in _ACTIVE_PROFILES:
+                profile.samples.update(stacks[t] for t in profile.thread_ids if t in stacks)
+
+class SamplingProfiler:
+    """
+    Collects folded stacks ("outer;inner;leaf") of the threads serving one request, which
+    flamegraph tools can consume directly. The starting thread is attached; threadpool
+    workers attach through profile_thread. Async requests overlapping on the event loop
+    still share its samples.
+    """
+    def __init__(self):
+        self.samples = _Tally()
+        self.thread_ids = set()
+
+    def start(self):
+        global _SAMPLER_THREAD
+        with _SAMPLER_LOCK:
+            self.thread_ids.add(threading.get_ident())
+            _ACTIVE_PROFILES.add(self)
+            if _SAMPLER_THREAD is None:
+                _SAMPLER_THREAD = threading.Thread(target=_sample_loop, name="gembridge-sampler", daemon=True)
+                _SAMPLER_THREAD.start()
+        return self
+
+    def attach(self, thread_id: int):
+        with _SAMPLER_LOCK:
+            self.thread_ids.add(thread_id)
+
+    def detach(self, thread_id: int):
+        with _SAMPLER_LOCK:
+            self.thread_ids.discard(thread_id)
+
+    def stop(self):
+        """Detaches from the sampler and returns a snapshot of the collected stacks."""
+        with _SAMPLER_LOCK:
+            _ACTIVE_PROFILES.discard(self)
+            return _Tally(self.samples)
+
+def profile_thread(func):
+    """Decorator for sync endpoints: attaches the threadpool worker running them to the request's profile."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = _CURRENT_PROFILE.get()
+        if profile is None:
+            return func(*args, **kwargs)
+        thread_id = threading.get_ident()
+        profile.attach(thread_id)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.detach(thread_id)
+    return wrapper
+
+# Opt-in via env: GEMBRIDGE_PROFILE_SLOW_MS=500 profiles requests and logs stacks for those slower than 500ms
+PROFILE_SLOW_MS = float(os.getenv("GEMBRIDGE_PROFILE_SLOW_MS", "0"))
+PROFILE_SAMPLE_RATE = float(os.getenv("GEMBRIDGE_PROFILE_SAMPLE_RATE", "1.0"))
+
+def maybe_start_profiler() -> Optional[SamplingProfiler]:
+    """Starts a profiler for this request if slow-request profiling is enabled and the request is sampled."""
+    if PROFILE_SLOW_MS <= 0 or random.random() >= PROFILE_SAMPLE_RATE:
+        return None
+    profiler = SamplingProfiler().start()
+    _CURRENT_PROFILE.set(profiler)
+    return profiler
+
+def report_slow_request(profiler: Optional[SamplingProfiler], label: str, elapsed: float, top: int = 10):
+    """Stops the profiler and logs the hottest stacks if the request exceeded the slow threshold."""
+    if profiler is None:
+        return
+    samples = profiler.stop()
+    _CURRENT_PROFILE.set(None)
+    if elapsed * 1000 < PROFILE_SLOW_MS or not samples:
+        return
+    hottest = "\n".join(f"  {count:5d} {stack}" for stack, count in samples.most_common(top))
+    logger.warning(f"Slow request {label}: {elapsed * 1000:.0f}ms, {sum(samples.values())} samples\n{hottest}")
@@ -1,16 +1,30 @@
 import numpy as np
 import pandas as pd
-from scipy.optimize import minimize
-from scipy.interpolate import interp1d
+from scipy.optimize import minimize, brentq
+from functools import lru_cache
 import logging
+import time
+
+from metrics import NSS_FIT_DURATION, NSS_FIT_ITERATIONS, NSS_FIT_FAILURES
 
 logger = logging.getLogger(__name__)
 
+# Default CDS recovery assumption (ISDA standard for senior sovereign debt)
+DEFAULT_RECOVERY = 0.4
+
+def record_nss_fit(duration, iterations, success):
+    """Feeds one NSS fit into the fit duration, iteration and failure metrics."""
+    NSS_FIT_DURATION.observe(duration)
+    NSS_FIT_ITERATIONS.observe(iterations)
+    if not success:
+        NSS_FIT_FAILURES.inc()
+
 class SovereignRVEngine:
     def __init__(self, maturities=None, yields=None):
         self.maturities = np.array(maturities) if maturities is not None else np.array([])
         self.yields = np.array(yields) if yields is not None else np.array([])
         self.params = None
+        self.last_fit = None
 
     def nss_model(self, m, b0, b1, b2, b3, t1, t2):
         """Nelson-Siegel-Svensson (NSS) model for the yield curve."""
@@ -29,8 +43,9 @@ class SovereignRVEngine:
         fitted = self.nss_model(maturities, *p)
         return np.sum((yields - fitted)**2)
 
-    def fit_curve(self, maturities, yields):
-        """Optimizes NSS parameters to fit the provided market yields."""
+    def fit_curve(self, maturities, yields, x0=None):
+        """Optimizes NSS parameters to fit the provided market yields.
+        Pass x0 (e.g. the previous day's params) to warm-start the optimizer."""
         maturities = np.array(maturities)
         yields = np.array(yields)
         if len(maturities) < 6:
@@ -39,7 +54,8 @@ class SovereignRVEngine:
         # Initial guesses: [b0, b1, b2, b3, t1, t2]
         # b0: Long-term (usually near the last yield)
         # b1: Short-term (spread between short and long)
-        x0 = [yields[-1], yields[0] - yields[-1], 0.0, 0.0, 1.0, 5.0]
+        if x0 is None:
+            x0 = [yields[-1], yields[0] - yields[-1], 0.0, 0.0, 1.0, 5.0]
         
         # Bounds to keep parameters realistic
         # t1 and t2 MUST be positive
@@ -52,7 +68,11 @@ class SovereignRVEngine:
             (0.1, 30.0)   # t2
         ]
         
+        start = time.perf_counter()
         res = minimize(self.objective, x0, args=(maturities, yields), bounds=bounds, method='L-BFGS-B')
+        # Kept on the engine so fits run in worker processes can be reported by the parent
+        self.last_fit = (time.perf_counter() - start, int(res.nit), bool(res.success))
+        record_nss_fit(*self.last_fit)
         
         if not res.success:
             logger.error(f"NSS fit failed: {res.message}")
@@ -62,15 +82,16 @@ class SovereignRVEngine:
         return self.params
 
     def get_fair_value_cds(self, bond_maturity, cds_tenors, cds_spreads, risk_free_rate=0.0):
-        """Interpolates Par CDS curve to find risk-neutral Fair Value yield."""
+        """Reads the bootstrapped CDS curve to find the risk-neutral Fair Value yield."""
         if not cds_tenors or not cds_spreads:
             return None
-            
-        f = interp1d(cds_tenors, cds_spreads, kind='linear', fill_value="extrapolate")
-        cds_premium = float(f(bond_maturity))
-        
-        # Fair Value Yield = Risk-Free + CDS Spread (simplified)
-        return risk_free_rate + (cds_premium / 10000.0) # Assume CDS in bps
+
+        curve = bootstrap_cds_curve(tuple(cds_tenors), tuple(cds_spreads), risk_free_rate)
+        cds_premium = curve.par_spread(bond_maturity)
+
+        # Fair Value Yield = Risk-Free + CDS-implied par spread at the bond's maturity
+        fair_value = risk_free_rate + cds_premium / 10000.0 # CDS in bps
+        return float(fair_value) if np.ndim(fair_value) == 0 else fair_value
 
     def calculate_rv_metrics(self, current_df, history_df=None):
         """
@@ -87,6 +108,114 @@ class SovereignRVEngine:
             
         return current_df
 
+class CDSCurve:
+    """
+    Credit curve with piecewise-constant hazard rates between CDS tenors.
+    Uses continuous premium accrual and a flat continuously-compounded risk-free
+    rate, so both legs integrate in closed form on each segment. Hazard is held
+    flat beyond the last tenor.
+    """
+    def __init__(self, tenors, hazard_rates, risk_free_rate=0.0, recovery=DEFAULT_RECOVERY):
+        self.tenors = np.asarray(tenors, dtype=float)
+        self.hazard_rates = np.asarray(hazard_rates, dtype=float)
+        self.risk_free_rate = risk_free_rate
+        self.recovery = recovery
+        self.starts = np.concatenate(([0.0], self.tenors[:-1]))
+
+        # Cumulative hazard, risky annuity and protection integrals at each knot
+        # (leading zero so index i gives the value at the start of segment i)
+        widths = self.tenors - self.starts
+        self.cum_hazard = np.concatenate(([0.0], np.cumsum(self.hazard_rates * widths)))
+        annuity = _segment_annuity(self.starts, widths, self.cum_hazard[:-1], self.hazard_rates, risk_free_rate)
+        self.cum_annuity = np.concatenate(([0.0], np.cumsum(annuity)))
+        self.cum_protection = np.concatenate(([0.0], np.cumsum(self.hazard_rates * annuity)))
+
+    def _locate(self, t):
+        t = np.maximum(np.asarray(t, dtype=float), 0.0)
+        idx = np.minimum(np.searchsorted(self.tenors, t, side='left'), len(self.tenors) - 1)
+        return t, idx, t - self.starts[idx]
+
+    def survival(self, t):
+        """Risk-neutral survival probability Q(t), vectorized over t."""
+        t, idx, dt = self._locate(t)
+        return np.exp(-(self.cum_hazard[idx] + self.hazard_rates[idx] * dt))
+
+    def par_spread(self, t):
+        """Fair par CDS spread (bps) for maturities t, vectorized over t."""
+        t, idx, dt = self._locate(t)
+        lam = self.hazard_rates[idx]
+        partial = _segment_annuity(self.starts[idx], dt, self.cum_hazard[idx], lam, self.risk_free_rate)
+        annuity = self.cum_annuity[idx] + partial
+        protection = self.cum_protection[idx] + lam * partial
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread = np.where(annuity > 0, (1 - self.recovery) * protection / annuity, (1 - self.recovery) * lam)
+        return spread * 10000.0
+
+def _segment_annuity(start, width, cum_hazard, hazard, r):
+    """Closed-form integral of exp(-r*u) * Q(u) over [start, start + width]."""
+    x = np.asarray(hazard, dtype=float) + r
+    width = np.asarray(width, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        decay = np.where(np.abs(x) > 1e-12, -np.expm1(-x * width) / x, width)
+    return np.exp(-(r * np.asarray(start) + cum_hazard)) * decay
+
+@lru_cache(maxsize=256)
+def bootstrap_cds_curve(tenors, spreads_bps, risk_free_rate=0.0, recovery=DEFAULT_RECOVERY):
+    """
+    Bootstraps piecewise-constant hazard rates from par CDS spreads.
+    Arguments are hashable tuples so each snapshot is bootstrapped once and cached.
+    """
+    if len(tenors) != len(spreads_bps) or len(tenors) == 0:
+        raise ValueError(f"CDS curve needs one spread per tenor, got {len(tenors)} tenors and {len(spreads_bps)} spreads.")
+    order = np.argsort(tenors)
+    tenors = np.asarray(tenors, dtype=float)[order]
+    spreads = np.asarray(spreads_bps, dtype=float)[order] / 10000.0
+    if tenors[0] <= 0 or np.any(np.diff(tenors) <= 0):
+        # Zero-width segments leave the hazard undetermined
+        raise ValueError(f"CDS tenors must be positive and distinct, got {tenors.tolist()}.")
+    r = risk_free_rate
+    lgd = 1 - recovery
+
+    hazards = []
+    cum_hazard, cum_annuity, cum_protection, start = 0.0, 0.0, 0.0, 0.0
+    for tenor, s in zip(tenors, spreads):
+        width = tenor - start
+
+        def par_gap(lam):
+            a = float(_segment_annuity(start, width, cum_hazard, lam, r))
+            return lgd * (cum_protection + lam * a) - s * (cum_annuity + a)
+
+        lo, hi = 0.0, 10.0
+        if par_gap(lo) >= 0:
+            logger.warning(f"CDS spread at {tenor}y implies negative forward hazard; flooring at 0.")
+            lam = lo
+        elif par_gap(hi) <= 0:
+            logger.warning(f"CDS spread at {tenor}y exceeds bootstrap bounds; capping hazard at {hi}.")
+            lam = hi
+        else:
+            lam = brentq(par_gap, lo, hi, xtol=1e-12)
+
+        a = float(_segment_annuity(start, width, cum_hazard, lam, r))
+        hazards.append(lam)
+        cum_annuity += a
+        cum_protection += lam * a
+        cum_hazard += lam * width
+        start = tenor
+
+    return CDSCurve(tenors, hazards, risk_free_rate, recovery)
+
+def get_fair_value_cds_batch(cds_by_country, maturities, risk_free_rate=0.0):
+    """Par CDS spreads (bps) at the same maturity grid for several sovereigns."""
+    maturities = np.asarray(maturities, dtype=float)
+    results = {}
+    for country, cds_data in cds_by_country.items():
+        if not cds_data:
+            continue
+        tenors = tuple(c["tenor"] for c in cds_data)
+        spreads = tuple(c["spread"] for c in cds_data)
+        results[country] = bootstrap_cds_curve(tenors, spreads, risk_free_rate).par_spread(maturities)
+    return results
+
 def get_nss_curve_points(params, max_maturity=30):
     """Generates points along the fitted curve for UI plotting."""
     if params is None: return []
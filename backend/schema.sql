@@ -25,3 +25,22 @@ CREATE TABLE IF NOT EXISTS market_history (
     PRIMARY KEY (market_id, outcome_label, timestamp),
     FOREIGN KEY (market_id) REFERENCES markets(id)
 );
+
+-- Full-text index over market questions. rowid mirrors markets.rowid and is
+-- maintained by the aggregator on every market write (see index_market_question).
+CREATE VIRTUAL TABLE IF NOT EXISTS markets_fts USING fts5(
+    question,
+    tokenize = 'porter unicode61',
+    prefix = '2 3'
+);
+
+-- Daily bond universe snapshots for historical RV replay (see backtest.py)
+CREATE TABLE IF NOT EXISTS bond_snapshots (
+    as_of_date TEXT,
+    country_code TEXT,
+    isin TEXT,
+    ticker TEXT,
+    maturity REAL,
+    yield REAL,
+    PRIMARY KEY (as_of_date, country_code, isin)
+);
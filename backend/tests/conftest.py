@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Backend modules are imported flat (e.g. `from aggregator import ...`), as main.py does
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
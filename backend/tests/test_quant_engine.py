@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from scipy.integrate import quad
+
+from quant_engine import bootstrap_cds_curve
+
+TENORS = (1, 3, 5, 7, 10)
+SPREADS = (120, 150, 185, 210, 240)
+
+def test_bootstrapped_curve_reprices_input_tenors():
+    curve = bootstrap_cds_curve(TENORS, SPREADS, 0.045)
+    np.testing.assert_allclose(curve.par_spread(np.array(TENORS)), SPREADS, rtol=1e-9)
+
+def test_par_spread_matches_numerical_integration():
+    r, recovery = 0.045, 0.4
+    curve = bootstrap_cds_curve(TENORS, SPREADS, r, recovery)
+
+    def hazard(t):
+        return curve.hazard_rates[min(np.searchsorted(curve.tenors, t), len(curve.tenors) - 1)]
+
+    for maturity in (2.0, 6.5, 15.0):
+        points = [t for t in curve.tenors if t < maturity]
+        annuity = quad(lambda t: np.exp(-r * t) * curve.survival(t), 0, maturity, points=points)[0]
+        protection = quad(lambda t: np.exp(-r * t) * curve.survival(t) * hazard(t), 0, maturity, points=points)[0]
+        expected = (1 - recovery) * protection / annuity * 10000
+        assert curve.par_spread(maturity) == pytest.approx(expected, rel=1e-6)
+
+@pytest.mark.parametrize("tenors, spreads", [
+    ((5, 5), (100, 200)),
+    ((0, 5), (100, 200)),
+    ((1, 3), (100, 200, 300)),
+    ((1, 3, 5), (100, 200)),
+])
+def test_rejects_invalid_tenors(tenors, spreads):
+    with pytest.raises(ValueError):
+        bootstrap_cds_curve(tenors, spreads)